@@ -1,19 +1,24 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import tempfile
 import os
 from pathlib import Path
 import json
-import pandas as pd
-import uuid
+from itertools import chain
 from prism.supabase_client import get_supabase_client
-
-from prism.pipeline import run_checks
-import openai
-import arxiv
-import requests
+from prism.persistence import get_persistence
 from urllib.parse import urlparse
 
+# pandas, openai, arxiv, requests and the analysis pipeline are imported inside
+# the handlers that use them so worker boot (and /api/health) stays cheap.
+# Set PRISM_PRELOAD=1 to import them up front instead, e.g. in a preforking
+# server where warmed workers are cloned from the master.
+if os.getenv("PRISM_PRELOAD") == "1":
+    from prism.warmup import preload_heavy_modules
+
+    _timings = preload_heavy_modules()
+    print(f"Preloaded {len(_timings)} modules in {sum(_timings.values()):.2f}s")
+
 app = Flask(__name__)
 CORS(
     app,
@@ -25,6 +30,7 @@ CORS(
 
 def transform_pipeline_results(results):
     """Transform pipeline results to match frontend expected format"""
+    import pandas as pd
 
     # Transform stat_tests DataFrame to list of dicts
     stat_tests_data = []
@@ -34,12 +40,14 @@ def transform_pipeline_results(results):
             stat_tests_data.append(
                 {
                     "test": f"{row.get('Statistic', 'Unknown')} test",
-                    "p_value": row.get("Computed_P", None),
-                    "reported_p": row.get("Reported_P", None),
+                    "p_value": row.get("Computed_P_Value", None),
+                    "reported_p": row.get("Reported_P_Value", None),
                     "significant": not row.get(
                         "Error", True
                     ),  # Error=False means test passed
                     "note": f"Decision Error: {row.get('Decision_Error', 'Unknown')}",
+                    "error": bool(row.get("Error", False)),
+                    "decision_error": bool(row.get("Decision_Error", False)),
                     "source": row.get("Source", "Unknown"),
                     "df1": row.get("df1", None),
                     "df2": row.get("df2", None),
@@ -71,6 +79,8 @@ def transform_pipeline_results(results):
 def generate_ai_review(analysis_json):
     """Generate AI technical review from analysis results."""
     try:
+        import openai
+
         openai.api_key = os.getenv("OPENAI_API_KEY")
         if not openai.api_key:
             return "OpenAI API key not configured"
@@ -140,6 +150,8 @@ def upload_file():
         if not file.filename.lower().endswith(".pdf"):
             return jsonify({"error": "Only PDF files are supported"}), 400
 
+        from prism.pipeline import run_checks
+
         # Save uploaded file to temporary location
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
             file.save(tmp_file.name)
@@ -159,44 +171,19 @@ def upload_file():
             review = generate_ai_review(json.dumps(transformed_results))
 
             # === Supabase integration ===
-            supabase = get_supabase_client()
-
-            bucket_name = "documents"  # Ensure this bucket exists and is public in Supabase dashboard
-
-            # Upload file to bucket using a UUID key to avoid collisions
-            doc_id = str(uuid.uuid4())
-            storage_path = f"{doc_id}/{file.filename}"
+            # Storage upload and row insert happen write-behind (batched,
+            # retried, dead-lettered on failure); the id and public URL are
+            # derived from the content hash so they are known up front.
             with open(tmp_path, "rb") as pdf_file:
-                supabase.storage.from_(bucket_name).upload(
-                    storage_path, pdf_file.read()
+                doc = get_persistence().save_document(
+                    pdf_file.read(), file.filename, transformed_results, review
                 )
 
-            # Build public URL for public bucket
-            supabase_url = os.getenv("SUPABASE_URL", "").rstrip("/")
-            public_url = (
-                f"{supabase_url}/storage/v1/object/public/{bucket_name}/{storage_path}"
-            )
-
-            # Insert metadata row
-            doc_record = {
-                "id": doc_id,
-                "filename": file.filename,
-                "storage_path": storage_path,
-                "public_url": public_url,
-                "uploaded_at": "now()",  # Supabase interprets literal string in SQL insert
-                "results": json.dumps(transformed_results),
-                "review": review,
-            }
-            try:
-                supabase.table("documents").insert(doc_record).execute()
-            except Exception as insert_err:
-                print(f"Error inserting document record: {insert_err}")
-
             return jsonify(
                 {
                     "message": "File uploaded and analyzed successfully",
-                    "document_id": doc_id,
-                    "public_url": public_url,
+                    "document_id": doc.doc_id,
+                    "public_url": doc.public_url,
                     "results": transformed_results,
                     "review": review,
                 }
@@ -250,12 +237,15 @@ def document_detail(doc_id):
     """Return metadata and analysis results for a single document."""
     try:
         supabase = get_supabase_client()
+        # Not .single(): that raises on zero rows, and a just-uploaded
+        # document is legitimately absent until the writer has stored it.
         response = (
-            supabase.table("documents").select("*").eq("id", doc_id).single().execute()
+            supabase.table("documents").select("*").eq("id", doc_id).limit(1).execute()
         )
-        record = response.data if hasattr(response, "data") else response
-        if not record:
+        rows = response.data if hasattr(response, "data") else response
+        if not rows:
             return jsonify({"error": "Document not found"}), 404
+        record = rows[0]
 
         # Handle results field - could be JSON string or already parsed dict
         results_field = record.get("results", "{}")
@@ -270,6 +260,87 @@ def document_detail(doc_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/export", methods=["GET"])
+def export_documents():
+    """Stream every document's analysis as NDJSON or Parquet.
+
+    Query params: format (ndjson|parquet), since/until (uploaded_at bounds; a
+    date-only until includes that whole day),
+    grim_failures=1 to keep only papers with a GRIM failure, page_size.
+    """
+    from prism.export import DEFAULT_PAGE_SIZE, FORMATS, export
+
+    fmt = request.args.get("format", "ndjson")
+    try:
+        page_size = int(request.args.get("page_size", DEFAULT_PAGE_SIZE))
+        chunks = export(
+            get_supabase_client(),
+            fmt,
+            since=request.args.get("since"),
+            until=request.args.get("until"),
+            grim_failures_only=request.args.get("grim_failures") in ("1", "true"),
+            page_size=max(1, min(page_size, 5000)),
+        )
+        # Fetch the first page before committing to a 200, so a bad query or
+        # an unreachable database is still reported as an error response.
+        first = next(chunks, None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error starting export: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    if first is not None:
+        chunks = chain([first], chunks)
+    mimetype, extension = FORMATS[fmt]
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=prism-export.{extension}"},
+    )
+
+
+@app.route("/api/findings", methods=["GET"])
+def list_findings():
+    """Query stat-test and GRIM findings across all documents.
+
+    Query params: kind (stat_test|grim), test (t, F, r, Chi2, Z, Q; any case),
+    document_id, error, decision_error, grim_passed (1/0), min_n, max_n, limit,
+    offset.
+    e.g. /api/findings?test=F&decision_error=1 or /api/findings?grim_passed=0&max_n=29
+    """
+    from prism.findings import query_findings
+
+    def flag(name):
+        value = request.args.get(name)
+        return None if value is None else value.lower() in ("1", "true")
+
+    def integer(name, default=None):
+        value = request.args.get(name)
+        return default if value is None else int(value)
+
+    try:
+        findings = query_findings(
+            get_supabase_client(),
+            kind=request.args.get("kind"),
+            test_type=request.args.get("test"),
+            document_id=request.args.get("document_id"),
+            error=flag("error"),
+            decision_error=flag("decision_error"),
+            grim_passed=flag("grim_passed"),
+            min_n=integer("min_n"),
+            max_n=integer("max_n"),
+            limit=integer("limit", 100),
+            offset=integer("offset", 0),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error querying findings: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"findings": findings})
+
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
@@ -290,6 +361,8 @@ def chat():
         if context:
             messages = [{"role": "system", "content": context}] + messages
 
+        import openai
+
         openai.api_key = os.getenv("OPENAI_API_KEY")
         if not openai.api_key:
             return jsonify({"error": "OPENAI_API_KEY not set on server"}), 500
@@ -320,6 +393,8 @@ def review():
             or """Role & Scope\nYou are a research-oriented AI. Analyse the attached paper and deliver a concise yet comprehensive technical review suitable for a sidebar display (≈350 words max).\n\nOutput format (plain text only)\n\nKey Findings (≤4 bullets) – one-line takeaways.\n\nStat & Math Check (≤5 bullets) – name each test, note any inconsistencies or typos.\n\nMethod & Data Quality (≤5 bullets) – comment on assumptions, outliers, missing data, bias controls.\n\nReproducibility Score (1–10) – single line.\n\nHow to Raise the Score (≤5 bullets) – specific, actionable fixes.\n\nEvaluation criteria\n• Verify calculations (p-values, dfs, effect sizes).\n• Judge the appropriateness of analytical techniques, significance thresholds, and multiple-comparison controls.\n• Assess transparency: data/code availability, preregistration, documentation.\n• Consider handling of data integrity issues (outliers, missing data, bias).\n\nStyle guidelines\n• Bullet points only; keep each bullet under 120 characters.\n• No tables, markdown headings, or fancy formatting—plain text bullets.\n• Use succinct technical language (e.g., “ANCOVA F(5,222)=4.9 OK”).\n\nDeliver just the sidebar text—no extra commentary."""
         )
 
+        import openai
+
         openai.api_key = os.getenv("OPENAI_API_KEY")
         if not openai.api_key:
             return jsonify({"error": "OPENAI_API_KEY not set"}), 500
@@ -345,6 +420,10 @@ def review():
 def fetch_arxiv():
     """Fetch 10 recent statistics papers from arXiv and analyze them."""
     try:
+        import arxiv
+        import requests
+        from prism.pipeline import run_checks
+
         client = arxiv.Client()
         search = arxiv.Search(
             query="cat:stat.AP",
@@ -379,45 +458,16 @@ def fetch_arxiv():
                     # Generate AI review
                     review = generate_ai_review(json.dumps(results))
 
-                    # Store in database
-                    supabase = get_supabase_client()
+                    # Queue for storage upload and a batched documents upsert
                     filename = f"{paper.title[:50]}.pdf"
-
-                    # Upload PDF to Supabase storage
                     with open(temp_path, "rb") as f:
-                        file_data = f.read()
-
-                    doc_id = str(uuid.uuid4())
-                    storage_path = f"{doc_id}/{filename}"
-
-                    # Upload to Supabase storage (same pattern as existing upload)
-                    supabase.storage.from_("documents").upload(storage_path, file_data)
-
-                    # Build public URL manually (same as existing upload)
-                    supabase_url = os.getenv("SUPABASE_URL", "").rstrip("/")
-                    public_url = f"{supabase_url}/storage/v1/object/public/documents/{storage_path}"
-
-                    # Insert document record
-                    insert_result = (
-                        supabase.table("documents")
-                        .insert(
-                            {
-                                "id": doc_id,
-                                "filename": filename,
-                                "storage_path": storage_path,
-                                "public_url": public_url,
-                                "results": json.dumps(
-                                    results
-                                ),  # Store as JSON string like existing upload
-                                "review": review,
-                            }
+                        doc = get_persistence().save_document(
+                            f.read(), filename, results, review
                         )
-                        .execute()
-                    )
 
                     papers.append(
                         {
-                            "id": doc_id,
+                            "id": doc.doc_id,
                             "title": paper.title,
                             "authors": [author.name for author in paper.authors],
                             "abstract": paper.summary,
@@ -425,7 +475,7 @@ def fetch_arxiv():
                             "arxiv_id": paper.entry_id.split("/")[-1],
                             "updated": paper.updated.isoformat(),
                             "filename": filename,
-                            "public_url": public_url,
+                            "public_url": doc.public_url,
                             "analysis_complete": True,
                         }
                     )
@@ -103,8 +103,76 @@
 
 import chainlit as cl
 from prism.pipeline import run_checks
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import tempfile
 import json
+import os
+
+# run_checks is synchronous and takes ~30 s; run it off the event loop so one
+# slow paper doesn't freeze every other session. Threads (not processes) so the
+# progress callback can hand events straight back to the loop.
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PRISM_ANALYSIS_WORKERS", "2")),
+    thread_name_prefix="prism-analysis",
+)
+
+_DONE = object()
+
+
+def analyse(pdf_path, progress):
+    """Run the pipeline on the worker thread and delete the temp PDF after.
+
+    The worker owns the file once it starts, so a cancelled or failed chat
+    handler never removes it from under a still-running run_checks.
+    """
+    try:
+        return run_checks(pdf_path, progress)
+    finally:
+        os.unlink(pdf_path)
+
+
+def format_stat_test(row) -> str:
+    """One-line summary of a statcheck row, e.g. "t(28) = 2.20, reported p = .04"."""
+    dfs = ",".join(
+        str(d) for d in (row.get("df1"), row.get("df2")) if d is not None and d == d
+    )  # d == d drops NaN (e.g. df2 for t-tests)
+    computed = row.get("Computed_P_Value")
+    computed = f"{computed:.4f}" if isinstance(computed, float) else computed
+    flag = "decision error" if row.get("Decision_Error") else "inconsistent p"
+    return (
+        f"{row.get('Statistic', '?')}({dfs}) = {row.get('Value')}, "
+        f"reported p = {row.get('Reported_P_Value')}, computed p = {computed} ({flag})"
+    )
+
+
+async def report_event(event, payload, summary):
+    """Post a chat message for a single pipeline progress event."""
+    if event == "text":
+        await cl.Message(
+            f"📄 Extracted {payload:,} characters. Running statcheck…"
+        ).send()
+
+    elif event == "stat_tests":
+        rows = payload.to_dict(orient="records") if payload is not None else []
+        flagged = [r for r in rows if r.get("Error")]
+        summary["stat_tests"] = len(rows)
+        summary["stat_errors"] = len(flagged)
+        lines = "\n".join(f"- {format_stat_test(r)}" for r in flagged)
+        await cl.Message(
+            f"📊 statcheck found {len(rows)} tests, {len(flagged)} inconsistent."
+            + (f"\n{lines}" if lines else "")
+            + "\n\nRunning GRIM checks…"
+        ).send()
+
+    elif event == "grim_check":
+        summary["grim_checks"] += 1
+        if payload["grim_ok"] is False:
+            summary["grim_failures"] += 1
+            await cl.Message(
+                f"⚠️ GRIM failure: mean {payload['mean']} is impossible with "
+                f"n = {payload['n']}\n> {payload['sentence']}"
+            ).send()
 
 
 @cl.on_message
@@ -122,11 +190,46 @@ async def main(message: cl.Message):
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
         f.write(await pdf_el.read())
 
-    await cl.Message("🔍 Running checks, this may take ~30 s…").send()
+    await cl.Message("🔍 Running checks, this may take ~30 s…").send()
 
-    results = run_checks(f.name)
-    pretty = json.dumps(results, indent=2)[:4000]  # truncate for chat
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def progress(event, payload):
+        # Called on the worker thread; hand the event to the loop.
+        loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+
+    summary = {"stat_tests": 0, "stat_errors": 0, "grim_checks": 0, "grim_failures": 0}
+    task = executor.submit(analyse, f.name, progress)
+    job = asyncio.wrap_future(task)
+    job.add_done_callback(lambda _: events.put_nowait(_DONE))
+    try:
+        while (item := await events.get()) is not _DONE:
+            await report_event(*item, summary)
+
+        results = job.result()
+    except Exception as e:
+        await cl.Message(f"❌ Analysis failed: {e}").send()
+        return
+    finally:
+        # Free the pool slot if we bail out (error, cancelled session) before
+        # the job has started; a job that never runs leaves the file to us.
+        if task.cancel():
+            os.unlink(f.name)
+
+    stat_tests = results["stat_tests"]
+    if stat_tests is not None and hasattr(stat_tests, "to_dict"):
+        results["stat_tests"] = stat_tests.to_dict(orient="records")
 
     await cl.Message(
-        f"Here’s the Phase 1 JSON (first 4 000 chars):\n```json\n{pretty}\n```"
+        f"✅ Done: {summary['stat_errors']}/{summary['stat_tests']} statcheck "
+        f"inconsistencies, {summary['grim_failures']}/{summary['grim_checks']} "
+        "GRIM failures. Full results attached.",
+        elements=[
+            cl.File(
+                name="prism_results.json",
+                content=json.dumps(results, indent=2, default=str).encode(),
+                display="inline",
+            )
+        ],
     ).send()
@@ -0,0 +1,19 @@
+# gunicorn.conf.py – production server for api.py
+#
+#   gunicorn api:app
+#
+# With PRISM_PRELOAD=1 the app is loaded once in the master, and api.py imports
+# its heavy dependencies eagerly (prism/warmup.py). Workers are then forked
+# from the warmed master, so new workers serve their first request without
+# paying the import cost again.
+import os
+
+bind = os.getenv("PRISM_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("PRISM_WORKERS", "2"))
+timeout = int(os.getenv("PRISM_TIMEOUT", "120"))  # analysis can take ~30 s
+# Time a stopping worker gets before it is killed. Exiting workers drain
+# queued uploads and row writes for PRISM_SHUTDOWN_DRAIN_S (default 20) and
+# dead-letter the rest, so keep this comfortably above that.
+graceful_timeout = int(os.getenv("PRISM_GRACEFUL_TIMEOUT", "30"))
+
+preload_app = os.getenv("PRISM_PRELOAD") == "1"
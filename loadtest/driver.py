@@ -0,0 +1,305 @@
+# loadtest/driver.py
+"""Replay mixed traffic against api.py and report per-endpoint latency.
+
+By default the Flask app is served in-process on an ephemeral port with
+Supabase, OpenAI and (optionally) the analysis pipeline replaced by the fakes
+in loadtest/fakes.py, so no network access or credentials are needed:
+
+    python -m loadtest.driver --rate 20 --duration 30
+    python -m loadtest.driver --mix upload=1,detail=6,list=2,chat=1 \\
+        --openai-latency 800 --openai-jitter 400 --supabase-error-rate 0.01
+
+Pass --url to drive an already running server instead (no fakes installed).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .fakes import FakeOpenAI, FakeSupabase, FaultProfile, install_fakes
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PDF = ROOT / "pdfs" / "false_test.pdf"
+DEFAULT_MIX = "upload=1,detail=5,list=3,chat=1"
+
+
+class Recorder:
+    """Thread-safe collector of (endpoint, latency, ok) samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+        self.offered_rate = 0.0
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Traffic:
+    """The request types in the mix; each method returns True on success."""
+
+    def __init__(
+        self,
+        base_url: str,
+        pdf_bytes: bytes,
+        concurrency: int = 10,
+        timeout: float = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.pdf_bytes = pdf_bytes
+        self.timeout = timeout
+        # One pooled connection per driver thread; requests' default pool of 10
+        # would otherwise make the extra threads wait on the client side.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.doc_ids: List[str] = []
+        self._ids_lock = threading.Lock()
+
+    def upload(self) -> bool:
+        # Documents are keyed by content hash, so give every upload distinct
+        # bytes (a trailing PDF comment) to measure separate ingests.
+        tag = uuid.uuid4().hex
+        pdf_bytes = self.pdf_bytes + f"\n% load-test {tag}\n".encode()
+        files = {"file": (f"load-{tag[:8]}.pdf", pdf_bytes)}
+        r = self.session.post(
+            f"{self.base_url}/api/upload", files=files, timeout=self.timeout
+        )
+        # The returned id is not kept: the row is written behind the response
+        # and 404s until then. detail() picks up new ids once list() sees them.
+        return r.ok
+
+    def resolve(self, endpoint: str) -> str:
+        """The request actually sent: ``detail`` needs a known id, else ``list``."""
+        if endpoint == "detail":
+            with self._ids_lock:
+                if not self.doc_ids:
+                    return "list"
+        return endpoint
+
+    def detail(self) -> bool:
+        with self._ids_lock:
+            doc_id = random.choice(self.doc_ids)
+        r = self.session.get(
+            f"{self.base_url}/api/documents/{doc_id}", timeout=self.timeout
+        )
+        return r.ok
+
+    def list(self) -> bool:
+        r = self.session.get(f"{self.base_url}/api/documents", timeout=self.timeout)
+        if r.ok:
+            ids = [d["id"] for d in r.json().get("documents", [])]
+            with self._ids_lock:
+                self.doc_ids = ids or self.doc_ids
+        return r.ok
+
+    def chat(self) -> bool:
+        message = {"role": "user", "content": "Summarise the GRIM findings."}
+        payload = {"messages": [message]}
+        r = self.session.post(
+            f"{self.base_url}/api/chat", json=payload, timeout=self.timeout
+        )
+        return r.ok
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"upload", "detail", "list", "chat"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown endpoint(s) in mix: {unknown}")
+    return mix
+
+
+def seed_documents(supabase: FakeSupabase, count: int):
+    """Pre-populate the fake documents table so detail/list reads have data."""
+    import api
+    from .fakes import make_fake_run_checks
+
+    results = api.transform_pipeline_results(make_fake_run_checks()(None))
+    rows = []
+    for i in range(count):
+        doc_id = str(uuid.uuid4())
+        rows.append(
+            {
+                "id": doc_id,
+                "filename": f"seed-{i}.pdf",
+                "storage_path": f"{doc_id}/seed-{i}.pdf",
+                "public_url": f"http://fake-supabase.local/{doc_id}/seed-{i}.pdf",
+                "results": json.dumps(results),
+                "review": "seeded",
+            }
+        )
+    if rows:
+        supabase.table("documents").insert(rows).execute()
+
+
+def start_local_server(args) -> str:
+    """Install the fakes, serve api.app on an ephemeral port, return its URL."""
+    from werkzeug.serving import make_server
+
+    supabase = FakeSupabase(
+        profile=FaultProfile(
+            args.supabase_latency, args.supabase_jitter, args.supabase_error_rate
+        )
+    )
+    openai = FakeOpenAI(
+        FaultProfile(args.openai_latency, args.openai_jitter, args.openai_error_rate)
+    )
+    pipeline = None if args.real_pipeline else FaultProfile(args.pipeline_latency)
+    install_fakes(supabase, openai, pipeline)
+
+    # Seed with faults switched off so setup never fails.
+    profile, supabase.profile = supabase.profile, FaultProfile()
+    seed_documents(supabase, args.seed_docs)
+    supabase.profile = profile
+
+    import api
+
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run(
+    traffic: Traffic,
+    mix: Dict[str, float],
+    rate: float,
+    duration: float,
+    concurrency: int,
+) -> Recorder:
+    """
+    Open-loop load: requests are issued on a fixed schedule of ``rate`` per
+    second regardless of how fast earlier ones complete, so a slow server
+    shows up as latency rather than as a lower offered load.
+
+    Latency is measured from each request's scheduled send time, not from when
+    a pool thread picks it up, so time spent queued behind a saturated client
+    or server counts (no coordinated omission).
+    """
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+
+    def fire(endpoint: str, scheduled: float):
+        endpoint = traffic.resolve(endpoint)
+        try:
+            ok = getattr(traffic, endpoint)()
+        except requests.RequestException:
+            ok = False
+        recorder.record(endpoint, time.perf_counter() - scheduled, ok)
+
+    total = int(rate * duration)
+    recorder.offered_rate = rate
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = t0 + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(names, weights)[0], scheduled)
+    recorder.elapsed = time.perf_counter() - t0
+    return recorder
+
+
+def report(recorder: Recorder):
+    header = f"{'endpoint':<10} {'count':>6} {'errors':>6} {'rps':>7} " + " ".join(
+        f"{f'p{p} ms':>8}" for p in (50, 95, 99)
+    )
+    print(header)
+    print("-" * len(header))
+    all_samples = []
+    for endpoint in sorted(recorder.latencies):
+        samples = sorted(recorder.latencies[endpoint])
+        all_samples.extend(samples)
+        print(
+            f"{endpoint:<10} {len(samples):>6} {recorder.errors[endpoint]:>6} "
+            f"{len(samples) / recorder.elapsed:>7.1f} "
+            + " ".join(f"{percentile(samples, p) * 1000:>8.1f}" for p in (50, 95, 99))
+        )
+    all_samples.sort()
+    print("-" * len(header))
+    print(
+        f"{'total':<10} {len(all_samples):>6} {sum(recorder.errors.values()):>6} "
+        f"{len(all_samples) / recorder.elapsed:>7.1f} "
+        + " ".join(f"{percentile(all_samples, p) * 1000:>8.1f}" for p in (50, 95, 99))
+    )
+    achieved = len(all_samples) / recorder.elapsed
+    print(
+        f"\noffered {recorder.offered_rate:.1f} req/s, achieved {achieved:.1f} req/s"
+        + (" (server or client saturated)" if achieved < 0.9 * recorder.offered_rate else "")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load-test api.py with local Supabase/OpenAI stand-ins."
+    )
+    parser.add_argument("--url", help="target a running server instead of in-process fakes")
+    parser.add_argument("--rate", type=float, default=10, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--pdf", type=Path, default=DEFAULT_PDF)
+    parser.add_argument("--seed-docs", type=int, default=200)
+    parser.add_argument("--seed", type=int, help="random seed for a repeatable mix")
+
+    faults = parser.add_argument_group("fake service profiles (ms / probability)")
+    for service, latency in (("supabase", 20), ("openai", 500)):
+        faults.add_argument(f"--{service}-latency", type=float, default=latency)
+        faults.add_argument(f"--{service}-jitter", type=float, default=latency / 2)
+        faults.add_argument(f"--{service}-error-rate", type=float, default=0.0)
+    faults.add_argument("--pipeline-latency", type=float, default=200)
+    faults.add_argument(
+        "--real-pipeline",
+        action="store_true",
+        help="run the real run_checks on uploads instead of a canned result",
+    )
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    base_url = args.url or start_local_server(args)
+    traffic = Traffic(base_url, args.pdf.read_bytes(), args.concurrency)
+    if "detail" in args.mix:
+        traffic.list()  # learn existing ids up front
+
+    print(
+        f"Driving {base_url} at {args.rate:g} req/s for {args.duration:g}s "
+        f"(mix: {', '.join(f'{k}={v:g}' for k, v in args.mix.items())})\n"
+    )
+    report(run(traffic, args.mix, args.rate, args.duration, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
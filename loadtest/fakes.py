@@ -0,0 +1,407 @@
+# loadtest/fakes.py
+"""In-process stand-ins for the external services api.py talks to.
+
+FakeSupabase implements the slice of the supabase-py client the API uses
+(storage uploads and the PostgREST query builder) on top of in-memory dicts.
+FakeOpenAI mimics ``openai.chat.completions.create``. Both take a
+FaultProfile so latency and error rates can be dialled in per service.
+"""
+from __future__ import annotations
+
+import copy
+import random
+import threading
+import time
+import types
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+
+class FakeServiceError(Exception):
+    """Raised by a fake service when its FaultProfile injects a failure."""
+
+
+@dataclass
+class FaultProfile:
+    """Latency/error behaviour of a fake service, applied on every call."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    def apply(self, what: str):
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeServiceError(f"injected failure in {what}")
+
+
+# ----- Supabase -----
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def _split_terms(expr: str) -> List[str]:
+    """Split a PostgREST logic expression on its top-level commas."""
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and not depth and ch == ",":
+            terms.append(expr[start:i])
+            start = i + 1
+    terms.append(expr[start:])
+    return terms
+
+
+def _logic_predicate(expr: str, combine=any):
+    """Compile ``col.op.value,and(...)`` (the or=(...) filter syntax) to a row predicate."""
+    predicates = []
+    for term in _split_terms(expr):
+        for name, nested in (("and(", all), ("or(", any)):
+            if term.startswith(name) and term.endswith(")"):
+                predicates.append(_logic_predicate(term[len(name) : -1], nested))
+                break
+        else:
+            column, op, value = term.split(".", 2)
+            value = value[1:-1] if value.startswith('"') else value
+            predicates.append(
+                lambda r, c=column, f=_OPERATORS[op], v=value: f(r.get(c), v)
+            )
+    return lambda row: combine(p(row) for p in predicates)
+
+
+class FakeQuery:
+    """Chainable subset of postgrest's request builder."""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self._db = db
+        self._table = table
+        self._columns: Optional[List[str]] = None
+        self._filters: List = []
+        self._order: List = []
+        self._range: Optional[tuple] = None
+        self._single = False
+        self._write: Optional[tuple] = None
+
+    # -- reads --
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def _filter(self, column, op, value):
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, _OPERATORS["eq"], value)
+
+    def neq(self, column, value):
+        return self._filter(column, _OPERATORS["neq"], value)
+
+    def gt(self, column, value):
+        return self._filter(column, _OPERATORS["gt"], value)
+
+    def gte(self, column, value):
+        return self._filter(column, _OPERATORS["gte"], value)
+
+    def lt(self, column, value):
+        return self._filter(column, _OPERATORS["lt"], value)
+
+    def lte(self, column, value):
+        return self._filter(column, _OPERATORS["lte"], value)
+
+    def in_(self, column, values):
+        return self._filter(column, lambda a, b: a in b, list(values))
+
+    def or_(self, filters: str):
+        # Values compare as strings, which is exact for the ISO timestamps and
+        # text ids the app filters on.
+        predicate = _logic_predicate(filters)
+        return self._filter(None, lambda row, _: predicate(row), None)
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, size):
+        return self.range(0, size - 1)
+
+    def single(self):
+        self._single = True
+        return self
+
+    # -- writes --
+    def insert(self, rows, **kwargs):
+        self._write = ("insert", rows, None)
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id", **kwargs):
+        self._write = ("upsert", rows, on_conflict)
+        return self
+
+    def delete(self, **kwargs):
+        self._write = ("delete", None, None)
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._db.profile.apply(f"table {self._table}")
+        with self._db._lock:
+            if self._write:
+                return self._execute_write()
+            return self._execute_read()
+
+    def _execute_write(self):
+        kind, rows, key = self._write
+        if kind == "delete":
+            return self._execute_delete()
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        table = self._db.tables.setdefault(self._table, {})
+        written = []
+        key_columns = [c.strip() for c in (key or "id").split(",")]
+        for row in rows:
+            row = dict(row)
+            pk = tuple(row.get(c) for c in key_columns)
+            if pk in table:
+                if kind == "insert":
+                    raise FakeServiceError(f"duplicate key {pk!r} in {self._table}")
+                # ON CONFLICT DO UPDATE: only the supplied columns change.
+                row = {**table[pk], **row}
+            elif self._table == "documents":  # column defaults of the real table
+                row.setdefault("id", str(uuid.uuid4()))
+                if row.get("uploaded_at") in (None, "now()"):
+                    row["uploaded_at"] = self._db.now()
+            table[pk] = row
+            written.append(copy.deepcopy(row))
+        return FakeResponse(data=written)
+
+    def _matches(self, row) -> bool:
+        return all(
+            op(row if column is None else row.get(column), value)
+            for column, op, value in self._filters
+        )
+
+    def _execute_delete(self):
+        table = self._db.tables.get(self._table, {})
+        deleted = []
+        for pk, row in list(table.items()):
+            if self._matches(row):
+                deleted.append(table.pop(pk))
+        return FakeResponse(data=deleted)
+
+    def _execute_read(self):
+        rows = [r for r in self._db.tables.get(self._table, {}).values() if self._matches(r)]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        count = len(rows)
+        if self._range:
+            start, end = self._range
+            rows = rows[start : end + 1]
+        if self._columns:
+            rows = [{c: r.get(c) for c in self._columns} for r in rows]
+        rows = copy.deepcopy(rows)
+        if self._single:
+            if len(rows) != 1:
+                raise FakeServiceError(f"expected 1 row, got {len(rows)}")
+            return FakeResponse(data=rows[0], count=count)
+        return FakeResponse(data=rows, count=count)
+
+
+class FakeBucket:
+    def __init__(self, db: "FakeSupabase", name: str):
+        self._db = db
+        self._name = name
+
+    def upload(self, path: str, data: bytes, file_options: Optional[dict] = None):
+        self._db.storage_profile.apply(f"storage {self._name}")
+        with self._db._lock:
+            objects = self._db.objects.setdefault(self._name, {})
+            # storage3 turns file_options into request headers; only x-upsert
+            # allows overwriting an existing object.
+            options = {"x-upsert": "false", **(file_options or {})}
+            upsert = str(options["x-upsert"]).lower() == "true"
+            if path in objects and not upsert:
+                raise FakeServiceError(f"object {path!r} already exists")
+            objects[path] = bytes(data)
+        return {"Key": f"{self._name}/{path}"}
+
+
+class FakeStorage:
+    def __init__(self, db: "FakeSupabase"):
+        self._db = db
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._db, bucket)
+
+
+class FakeSupabase:
+    """Thread-safe in-memory replacement for ``supabase.Client``."""
+
+    def __init__(
+        self,
+        profile: Optional[FaultProfile] = None,
+        storage_profile: Optional[FaultProfile] = None,
+    ):
+        self.profile = profile or FaultProfile()
+        self.storage_profile = storage_profile or self.profile
+        self.tables: Dict[str, Dict[str, dict]] = {}
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+        self.storage = FakeStorage(self)
+        self._lock = threading.Lock()
+        self._clock = datetime.now(timezone.utc)
+
+    def now(self) -> str:
+        # Strictly increasing so ordering by uploaded_at is deterministic.
+        self._clock += timedelta(microseconds=1)
+        return self._clock.isoformat()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+
+# ----- OpenAI -----
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[dict], **kwargs):
+        self._owner.profile.apply("chat.completions")
+        last = messages[-1]["content"] if messages else ""
+        content = f"[fake {model}] {self._owner.reply} ({len(last)} chars in)"
+        message = types.SimpleNamespace(role="assistant", content=content)
+        return types.SimpleNamespace(
+            model=model, choices=[types.SimpleNamespace(index=0, message=message)]
+        )
+
+
+class FakeOpenAI(types.ModuleType):
+    """Module-shaped stand-in for ``openai``; install it in ``sys.modules``."""
+
+    def __init__(self, profile: Optional[FaultProfile] = None, reply: str = "OK"):
+        super().__init__("openai")
+        self.profile = profile or FaultProfile()
+        self.reply = reply
+        self.api_key = None
+        self.chat = types.SimpleNamespace(completions=_FakeCompletions(self))
+
+
+# ----- analysis pipeline -----
+
+
+def make_fake_run_checks(profile: Optional[FaultProfile] = None):
+    """Return a run_checks() replacement producing a small canned result."""
+    profile = profile or FaultProfile()
+
+    def run_checks(pdf_path, progress=None):
+        import pandas as pd
+
+        # Same columns, in the same order, as statcheck 0.0.4's results frame.
+        profile.apply("run_checks")
+        df = pd.DataFrame(
+            [
+                {
+                    "Source": "fake.pdf",
+                    "Statistic": "F",
+                    "df1": 2.0,
+                    "df2": 27.0,
+                    "Test_Comparison": "=",
+                    "Value": 4.1,
+                    "Reported_P_Comparison": "<",
+                    "Reported_P_Value": 0.01,
+                    "Computed_P_Value": 0.028,
+                    "Raw": "F(2, 27) = 4.10, p < .01",
+                    "Error": True,
+                    "Decision_Error": False,
+                    "OneTailedInTxt": False,
+                    "APAfactor": 1.0,
+                },
+                {
+                    "Source": "fake.pdf",
+                    "Statistic": "t",
+                    "df1": None,
+                    "df2": 28.0,
+                    "Test_Comparison": "=",
+                    "Value": 2.2,
+                    "Reported_P_Comparison": "=",
+                    "Reported_P_Value": 0.036,
+                    "Computed_P_Value": 0.0362,
+                    "Raw": "t(28) = 2.20, p = .036",
+                    "Error": False,
+                    "Decision_Error": False,
+                    "OneTailedInTxt": False,
+                    "APAfactor": 1.0,
+                },
+            ]
+        )
+        grim = [
+            {"sentence": "M = 3.47, N = 21.", "mean": 3.47, "n": 21, "grim_ok": False},
+            {"sentence": "M = 5.20, N = 25.", "mean": 5.2, "n": 25, "grim_ok": True},
+        ]
+        if progress:
+            progress("text", 0)
+            progress("stat_tests", df)
+            for check in grim:
+                progress("grim_check", check)
+        return {"stat_tests": df, "grim_checks": grim}
+
+    return run_checks
+
+
+def install_fakes(
+    supabase: Optional[FakeSupabase] = None,
+    openai: Optional[FakeOpenAI] = None,
+    pipeline: Optional[FaultProfile] = None,
+):
+    """
+    Point api.py at the fakes. Must run before the first request is served;
+    api.py imports openai and run_checks lazily, so patching sys.modules and
+    prism.pipeline is enough. Pass ``pipeline=None`` to keep the real analysis.
+    Returns (supabase, openai).
+    """
+    import os
+    import sys
+
+    import api
+    import prism.pipeline
+    import prism.supabase_client
+
+    supabase = supabase or FakeSupabase()
+    openai = openai or FakeOpenAI()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    os.environ.setdefault("SUPABASE_URL", "http://fake-supabase.local")
+    sys.modules["openai"] = openai
+    api.get_supabase_client = prism.supabase_client.get_supabase_client = (
+        lambda: supabase
+    )
+    if pipeline is not None:
+        prism.pipeline.run_checks = make_fake_run_checks(pipeline)
+    return supabase, openai
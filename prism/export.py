@@ -0,0 +1,262 @@
+# prism/export.py
+"""Streaming bulk export of stored analyses.
+
+Documents are read from Supabase one page at a time and re-emitted as NDJSON
+lines or Parquet row groups through generators, so memory stays flat however
+large the corpus is. Used by the /api/export endpoint and as a CLI:
+
+    python -m prism.export --since 2025-01-01 --grim-failures -o corpus.ndjson
+    python -m prism.export --format parquet -o corpus.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+DEFAULT_PAGE_SIZE = 500
+EXPORT_COLUMNS = "id, filename, public_url, uploaded_at, results, review"
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _date_only(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None  # has a time component (or is not a date at all)
+
+
+def _check_timestamp(name: str, value: Optional[str]):
+    if value is None:
+        return
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or date-time, got {value!r}") from None
+
+
+def iter_documents(
+    supabase,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``documents`` rows uploaded in [since, until], oldest first.
+    A date-only ``until`` (e.g. "2025-01-31") includes that whole day.
+    Pages are fetched by keyset on (uploaded_at, id): each page starts after
+    the last row of the previous one, so every page is an index range scan
+    and rows deleted mid-export cannot shift later rows past the cursor.
+    """
+    last = None
+    while True:
+        query = supabase.table("documents").select(EXPORT_COLUMNS)
+        if since:
+            query = query.gte("uploaded_at", since)
+        if until:
+            day = _date_only(until)
+            if day:
+                query = query.lt("uploaded_at", (day + timedelta(days=1)).isoformat())
+            else:
+                query = query.lte("uploaded_at", until)
+        if last:
+            uploaded_at, doc_id = (f'"{last[key]}"' for key in ("uploaded_at", "id"))
+            query = query.or_(
+                f"uploaded_at.gt.{uploaded_at},"
+                f"and(uploaded_at.eq.{uploaded_at},id.gt.{doc_id})"
+            )
+        response = query.order("uploaded_at").order("id").limit(page_size).execute()
+        rows = response.data if hasattr(response, "data") else response
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+
+def has_grim_failure(results: Dict[str, Any]) -> bool:
+    return any(check.get("passed") is False for check in results.get("grim_checks", []))
+
+
+def iter_export_records(
+    supabase,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    grim_failures_only: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Yield documents with ``results`` parsed, applying the GRIM filter."""
+    for record in iter_documents(supabase, since, until, page_size):
+        results = record.get("results") or "{}"
+        if isinstance(results, str):
+            results = json.loads(results)
+        record["results"] = results
+        if grim_failures_only and not has_grim_failure(results):
+            continue
+        yield record
+
+
+def to_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def _summary_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a record for Parquet: counts as columns, results kept as JSON."""
+    results = record["results"]
+    stat_tests = results.get("stat_tests", [])
+    grim_checks = results.get("grim_checks", [])
+    return {
+        "id": record.get("id"),
+        "filename": record.get("filename"),
+        "public_url": record.get("public_url"),
+        "uploaded_at": str(record.get("uploaded_at")),
+        "n_stat_tests": len(stat_tests),
+        "n_stat_errors": sum(1 for t in stat_tests if t.get("significant") is False),
+        "n_grim_checks": len(grim_checks),
+        "n_grim_failures": sum(1 for g in grim_checks if g.get("passed") is False),
+        "results": json.dumps(results, default=str),
+        "review": record.get("review"),
+    }
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def to_parquet(
+    records: Iterable[Dict[str, Any]], row_group_size: int = DEFAULT_PAGE_SIZE
+) -> Iterator[bytes]:
+    """
+    Return a generator of a Parquet file in pieces, one row group at a time.
+    pyarrow is imported here rather than inside the generator, so a missing
+    install fails the call instead of the first chunk of a streamed response.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("filename", pa.string()),
+            ("public_url", pa.string()),
+            ("uploaded_at", pa.string()),
+            ("n_stat_tests", pa.int32()),
+            ("n_stat_errors", pa.int32()),
+            ("n_grim_checks", pa.int32()),
+            ("n_grim_failures", pa.int32()),
+            ("results", pa.string()),
+            ("review", pa.string()),
+        ]
+    )
+
+    def chunks():
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+
+        def flush(batch):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            return sink.drain()
+
+        batch = []
+        for record in records:
+            batch.append(_summary_row(record))
+            if len(batch) >= row_group_size:
+                yield flush(batch)
+                batch = []
+        if batch:
+            yield flush(batch)
+        writer.close()
+        yield sink.drain()
+
+    return chunks()
+
+
+def export(
+    supabase,
+    fmt: str = "ndjson",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    grim_failures_only: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[str | bytes]:
+    """
+    Stream the filtered corpus in ``fmt`` ("ndjson" or "parquet").
+    Arguments are validated up front and raise ValueError; errors while
+    reading pages surface from the returned iterator.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format {fmt!r}; use one of {list(FORMATS)}")
+    _check_timestamp("since", since)
+    _check_timestamp("until", until)
+    records = iter_export_records(
+        supabase, since, until, grim_failures_only, page_size
+    )
+    if fmt == "parquet":
+        return to_parquet(records, page_size)
+    return to_ndjson(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk export of PRISM analyses.")
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("--since", help="earliest uploaded_at (ISO date/time)")
+    parser.add_argument(
+        "--until", help="latest uploaded_at (ISO date/time; a bare date includes that day)"
+    )
+    parser.add_argument(
+        "--grim-failures", action="store_true", help="only papers with a GRIM failure"
+    )
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    from .supabase_client import get_supabase_client
+
+    chunks = export(
+        get_supabase_client(),
+        args.format,
+        args.since,
+        args.until,
+        args.grim_failures,
+        args.page_size,
+    )
+    binary = args.format == "parquet"
+    if args.output:
+        out = open(args.output, "wb" if binary else "w")
+    else:
+        out = sys.stdout.buffer if binary else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
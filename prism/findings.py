@@ -0,0 +1,190 @@
+# prism/findings.py
+"""Cross-paper findings index.
+
+Every stat-test row and GRIM check from transform_pipeline_results() is
+flattened into the typed ``findings`` table (supabase/migrations/), so corpus
+questions such as "decision errors in F-tests" or "GRIM failures with n < 30"
+are indexed lookups instead of a scan over every documents.results blob.
+
+Rows are written on each upload; rebuild the index for existing documents with
+
+    python -m prism.findings
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Any, Dict, List, Optional
+
+FINDINGS_KEY = "document_id,kind,ordinal"
+# Bulk upserts need every row to carry the same keys, so both kinds of row
+# are padded out to the full column set.
+FINDINGS_COLUMNS = (
+    "document_id", "kind", "ordinal", "uploaded_at",
+    "test_type", "test_statistic", "df1", "df2", "reported_p", "computed_p",
+    "error", "decision_error", "source",
+    "mean", "n", "grim_passed", "sentence",
+)
+MAX_QUERY_LIMIT = 1000
+
+
+def _decision_error(test: Dict[str, Any]) -> Optional[bool]:
+    if "decision_error" in test:
+        return test["decision_error"]
+    # Results stored before the field existed only carry it in the note.
+    note = test.get("note") or ""
+    if note.startswith("Decision Error: "):
+        return {"True": True, "False": False}.get(note.split(": ", 1)[1])
+    return None
+
+
+def _number(value):
+    # NaN (pandas' missing value) is not valid JSON / double input for PostgREST.
+    if value is None or value != value:
+        return None
+    return float(value)
+
+
+def flatten_findings(
+    document_id: str, results: Dict[str, Any], uploaded_at: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Turn one document's transformed results into ``findings`` rows."""
+    rows = []
+    for ordinal, test in enumerate(results.get("stat_tests", [])):
+        error = test.get("error")
+        if error is None and test.get("significant") is not None:
+            error = not test["significant"]  # significant == not Error
+        test_type = (test.get("test") or "").lower()
+        if test_type.endswith(" test"):
+            test_type = test_type[: -len(" test")]
+        rows.append(
+            {
+                "document_id": document_id,
+                "kind": "stat_test",
+                "ordinal": ordinal,
+                "uploaded_at": uploaded_at,
+                "test_type": test_type or None,
+                "test_statistic": _number(test.get("test_statistic")),
+                "df1": _number(test.get("df1")),
+                "df2": _number(test.get("df2")),
+                "reported_p": _number(test.get("reported_p")),
+                "computed_p": _number(test.get("p_value")),
+                "error": error,
+                "decision_error": _decision_error(test),
+                "source": test.get("source"),
+            }
+        )
+    for ordinal, check in enumerate(results.get("grim_checks", [])):
+        rows.append(
+            {
+                "document_id": document_id,
+                "kind": "grim",
+                "ordinal": ordinal,
+                "uploaded_at": uploaded_at,
+                "mean": _number(check.get("mean")),
+                "n": check.get("n"),
+                "grim_passed": check.get("passed"),
+                "sentence": check.get("sentence"),
+            }
+        )
+    return [{column: row.get(column) for column in FINDINGS_COLUMNS} for row in rows]
+
+
+def index_documents(supabase, documents: List[tuple]) -> int:
+    """
+    Replace the findings of several documents, given as
+    (document_id, results, uploaded_at) tuples, and return the row count.
+    Costs two round-trips however many documents there are: one delete of
+    their old rows, so a re-index with fewer findings leaves nothing stale,
+    and one bulk upsert.
+    """
+    rows = []
+    for document_id, results, uploaded_at in documents:
+        rows.extend(flatten_findings(document_id, results, uploaded_at))
+    if not documents:
+        return 0
+    supabase.table("findings").delete().in_(
+        "document_id", [d[0] for d in documents]
+    ).execute()
+    if rows:
+        supabase.table("findings").upsert(rows, on_conflict=FINDINGS_KEY).execute()
+    return len(rows)
+
+
+def index_document(
+    supabase,
+    document_id: str,
+    results: Dict[str, Any],
+    uploaded_at: Optional[str] = None,
+) -> int:
+    """Replace one document's findings; re-indexing is idempotent."""
+    return index_documents(supabase, [(document_id, results, uploaded_at)])
+
+
+def query_findings(
+    supabase,
+    kind: Optional[str] = None,
+    test_type: Optional[str] = None,
+    document_id: Optional[str] = None,
+    error: Optional[bool] = None,
+    decision_error: Optional[bool] = None,
+    grim_passed: Optional[bool] = None,
+    min_n: Optional[int] = None,
+    max_n: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """Filter the findings table; every argument maps to an indexed column.
+
+    ``test_type`` is matched case-insensitively (statcheck's labels, stored
+    lower-cased: t, f, r, chi2, z, q).
+    """
+    if test_type is not None:
+        test_type = test_type.lower()
+    query = supabase.table("findings").select("*")
+    for column, value in (
+        ("kind", kind),
+        ("test_type", test_type),
+        ("document_id", document_id),
+        ("error", error),
+        ("decision_error", decision_error),
+        ("grim_passed", grim_passed),
+    ):
+        if value is not None:
+            query = query.eq(column, value)
+    if min_n is not None:
+        query = query.gte("n", min_n)
+    if max_n is not None:
+        query = query.lte("n", max_n)
+    limit = max(1, min(limit, MAX_QUERY_LIMIT))
+    response = (
+        query.order("document_id")
+        .order("kind")
+        .order("ordinal")
+        .range(offset, offset + limit - 1)
+        .execute()
+    )
+    return response.data if hasattr(response, "data") else response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backfill the findings index from stored documents."
+    )
+    parser.add_argument("--since", help="only documents uploaded at or after this time")
+    args = parser.parse_args(argv)
+
+    from .export import iter_export_records
+    from .supabase_client import get_supabase_client
+
+    supabase = get_supabase_client()
+    documents = findings = 0
+    for record in iter_export_records(supabase, since=args.since):
+        findings += index_document(
+            supabase, record["id"], record["results"], record.get("uploaded_at")
+        )
+        documents += 1
+    print(f"Indexed {findings} findings from {documents} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 # prism/pdf_utils.py
-import pdfplumber
 from pathlib import Path
 
 def pdf_to_text(pdf_path: str | Path) -> str:
@@ -7,6 +6,8 @@ def pdf_to_text(pdf_path: str | Path) -> str:
     Concatenate text from every page of a PDF.
     Empty pages return an empty string so join() is safe.
     """
+    import pdfplumber  # heavy; only paid once a PDF is actually parsed
+
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(pdf_path)
@@ -0,0 +1,432 @@
+# prism/persistence.py
+"""Batched, write-behind persistence of analysed documents to Supabase.
+
+Request handlers call ``get_persistence().save_document(...)`` and return
+immediately. Behind that:
+
+1. The PDF goes to Supabase storage on a bounded upload pool (worker count
+   and in-flight bytes are both capped), retried with exponential backoff.
+2. Once the PDF is stored, the ``documents`` row and its findings are queued.
+   A single writer thread drains the queue in batches, so N papers cost one
+   multi-row ``documents`` upsert (keyed by content hash) plus one ``findings``
+   delete and upsert instead of 2N round-trips.
+3. Anything that still fails after its retries is written to a dead-letter
+   directory rather than dropped; replay it with
+
+       python -m prism.persistence replay
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from . import supabase_client
+from .findings import index_documents
+
+T = TypeVar("T")
+
+BUCKET = "documents"
+# storage3 sends file_options as request headers, over defaults that include
+# "x-upsert: false" and a text/plain content type.
+UPLOAD_OPTIONS = {"x-upsert": "true", "content-type": "application/pdf"}
+# Namespace for deriving a stable document id from the PDF's content hash, so
+# a re-uploaded paper maps onto the same row, storage path and findings.
+DOCUMENT_NAMESPACE = uuid.UUID("6f1c6c52-9a3e-4d0c-8a53-1d3c6b0e9a71")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def document_id_for(digest: str) -> str:
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, digest))
+
+
+def public_url_for(storage_path: str, bucket: str = BUCKET) -> str:
+    supabase_url = os.getenv("SUPABASE_URL", "").rstrip("/")
+    return f"{supabase_url}/storage/v1/object/public/{bucket}/{storage_path}"
+
+
+def with_retries(
+    fn: Callable[[], T],
+    what: str,
+    attempts: int = 4,
+    base_delay: float = 0.25,
+    max_delay: float = 5.0,
+) -> T:
+    """Call ``fn`` until it succeeds, sleeping with jittered exponential backoff."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"[persistence] {what} failed ({e}); retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+@dataclass
+class PendingDocument:
+    """Everything needed to persist one analysed paper."""
+
+    doc_id: str
+    content_hash: str
+    filename: str
+    storage_path: str
+    public_url: str
+    results: Dict[str, Any]
+    review: str
+    pdf_bytes: Optional[bytes] = field(default=None, repr=False)
+    # Set when re-queued by replay_dead_letters; its files are removed only
+    # once the document has been written.
+    from_dead_letter: bool = field(default=False, repr=False)
+
+    def record(self) -> Dict[str, Any]:
+        """The JSON-serialisable fields, as stored in a dead-letter file."""
+        return {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in ("pdf_bytes", "from_dead_letter")
+        }
+
+    def row(self) -> Dict[str, Any]:
+        # uploaded_at is left to the column default, so re-uploading a paper
+        # keeps its original upload time (and its place in export order).
+        return {
+            "id": self.doc_id,
+            "content_hash": self.content_hash,
+            "filename": self.filename,
+            "storage_path": self.storage_path,
+            "public_url": self.public_url,
+            "results": json.dumps(self.results),
+            "review": self.review,
+        }
+
+
+class Persistence:
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] = None,
+        upload_workers: int = 4,
+        max_inflight_bytes: int = 64 * 1024 * 1024,
+        batch_size: int = 100,
+        linger: float = 0.2,
+        attempts: int = 4,
+        deadletter_dir: str | Path = "deadletter",
+    ):
+        self._client_factory = client_factory or (
+            lambda: supabase_client.get_supabase_client()
+        )
+        self.batch_size = batch_size
+        self.linger = linger
+        self.attempts = attempts
+        self.deadletter_dir = Path(deadletter_dir)
+
+        self._uploads = ThreadPoolExecutor(
+            max_workers=upload_workers, thread_name_prefix="prism-storage"
+        )
+        self._max_inflight = max_inflight_bytes
+        self._inflight = 0
+        self._inflight_cv = threading.Condition()
+
+        self._rows: "queue.Queue[Optional[PendingDocument]]" = queue.Queue()
+        # Accepted but not yet written or dead-lettered, keyed by id(doc), so
+        # close() can account for every document it could not finish.
+        self._pending: Dict[int, PendingDocument] = {}
+        self._pending_cv = threading.Condition()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="prism-writer", daemon=True
+        )
+        self._writer.start()
+        self._closed = False
+
+    # ----- public API -----
+
+    def save_document(
+        self,
+        pdf_bytes: bytes,
+        filename: str,
+        results: Dict[str, Any],
+        review: str,
+    ) -> PendingDocument:
+        """
+        Queue a paper for storage upload and row insert; returns at once with
+        the id and public URL the document will have once written.
+        """
+        digest = content_hash(pdf_bytes)
+        doc_id = document_id_for(digest)
+        storage_path = f"{doc_id}/{filename}"
+        doc = PendingDocument(
+            doc_id=doc_id,
+            content_hash=digest,
+            filename=filename,
+            storage_path=storage_path,
+            public_url=public_url_for(storage_path),
+            results=results,
+            review=review,
+            pdf_bytes=pdf_bytes,
+        )
+        self._accept(doc)
+        self._acquire_bytes(len(pdf_bytes))
+        self._uploads.submit(self._upload, doc)
+        return doc
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything accepted so far is written or dead-lettered."""
+        with self._pending_cv:
+            return self._pending_cv.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout: Optional[float] = 30):
+        """
+        Drain for up to ``timeout`` seconds, then dead-letter whatever is still
+        pending so nothing the API has acknowledged is lost on shutdown.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if not self.flush(timeout):
+            with self._pending_cv:
+                stranded = list(self._pending.values())
+            try:
+                self._dead_letter(stranded, "not written before shutdown")
+            finally:
+                self._done(stranded)
+        self._uploads.shutdown(wait=False, cancel_futures=True)
+        self._rows.put(None)
+        self._writer.join(timeout=5)
+
+    def _accept(self, doc: PendingDocument):
+        with self._pending_cv:
+            self._pending[id(doc)] = doc
+
+    def _done(self, docs: List[PendingDocument]):
+        with self._pending_cv:
+            for doc in docs:
+                self._pending.pop(id(doc), None)
+            self._pending_cv.notify_all()
+
+    # ----- storage uploads -----
+
+    def _acquire_bytes(self, size: int):
+        # A single PDF larger than the budget is still let through on its own.
+        size = min(size, self._max_inflight)
+        with self._inflight_cv:
+            self._inflight_cv.wait_for(
+                lambda: self._inflight + size <= self._max_inflight
+            )
+            self._inflight += size
+
+    def _release_bytes(self, size: int):
+        with self._inflight_cv:
+            self._inflight -= min(size, self._max_inflight)
+            self._inflight_cv.notify_all()
+
+    def _upload(self, doc: PendingDocument):
+        size = len(doc.pdf_bytes)
+        try:
+            client = self._client_factory()
+            with_retries(
+                lambda: client.storage.from_(BUCKET).upload(
+                    doc.storage_path, doc.pdf_bytes, file_options=UPLOAD_OPTIONS
+                ),
+                f"storage upload of {doc.storage_path}",
+                self.attempts,
+            )
+        except Exception as e:
+            try:
+                self._dead_letter([doc], f"storage upload: {e}")
+            finally:
+                self._done([doc])
+            return
+        finally:
+            self._release_bytes(size)
+        doc.pdf_bytes = None  # stored; don't hold it while the row waits
+        self._rows.put(doc)
+
+    # ----- write-behind row writer -----
+
+    def _next_batch(self) -> Optional[List[PendingDocument]]:
+        first = self._rows.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                doc = self._rows.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if doc is None:
+                self._rows.put(None)  # let the loop see the sentinel next
+                break
+            batch.append(doc)
+        return batch
+
+    def _write_loop(self):
+        # Nothing may escape this loop: a dead writer thread would leave every
+        # later document pending until shutdown.
+        while (batch := self._next_batch()) is not None:
+            try:
+                written = self._write_batch(batch)
+            except Exception as e:
+                self._dead_letter(batch, f"documents upsert: {e}")
+            else:
+                self._clear_dead_letters(d for d in batch if d.doc_id in written)
+            finally:
+                self._done(batch)
+
+    def _write_batch(self, batch: List[PendingDocument]) -> set:
+        """Upsert a batch; returns the ids of documents fully written."""
+        client = self._client_factory()
+        # The same paper can be queued twice (e.g. uploaded twice in quick
+        # succession); Postgres rejects a multi-row upsert touching a key twice.
+        unique = list({doc.content_hash: doc for doc in batch}.values())
+        response = with_retries(
+            lambda: client.table("documents")
+            .upsert([doc.row() for doc in unique], on_conflict="content_hash")
+            .execute(),
+            f"documents upsert of {len(unique)} rows",
+            self.attempts,
+        )
+        uploaded_at = {
+            row.get("id"): row.get("uploaded_at")
+            for row in (getattr(response, "data", None) or [])
+        }
+
+        documents = [
+            (doc.doc_id, doc.results, uploaded_at.get(doc.doc_id)) for doc in unique
+        ]
+        try:
+            with_retries(
+                lambda: index_documents(client, documents),
+                f"findings index of {len(unique)} documents",
+                self.attempts,
+            )
+        except Exception as e:
+            # Documents are stored; only the index is missing. Dead-letter so
+            # a replay (or `python -m prism.findings`) can rebuild it.
+            self._dead_letter(unique, f"findings index: {e}")
+            return set()
+        return {doc.doc_id for doc in unique}
+
+    # ----- dead letters -----
+
+    def _dead_letter(self, docs: List[PendingDocument], reason: str):
+        """Write each document to the dead-letter directory; never raises."""
+        for doc in docs:
+            try:
+                self._write_dead_letter(doc, reason)
+            except Exception as e:
+                # Out of disk, bad permissions, ...: all that is left is the log.
+                print(
+                    f"[persistence] LOST {doc.doc_id} ({doc.filename}): could not "
+                    f"dead-letter after {reason}: {e}"
+                )
+
+    def _write_dead_letter(self, doc: PendingDocument, reason: str):
+        self.deadletter_dir.mkdir(parents=True, exist_ok=True)
+        base = self.deadletter_dir / doc.doc_id
+        # pdf_bytes is dropped once the PDF is in storage; until then the
+        # PDF itself has to be kept for the replay.
+        pdf_bytes = doc.pdf_bytes
+        storage_uploaded = pdf_bytes is None
+        if not storage_uploaded:
+            base.with_suffix(".pdf").write_bytes(pdf_bytes)
+        record = {
+            "reason": reason,
+            "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "document": doc.record(),
+            "storage_uploaded": storage_uploaded,
+        }
+        # Write then rename, so a crash never leaves a truncated record.
+        tmp = base.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(record, default=str))
+        tmp.replace(base.with_suffix(".json"))
+        print(f"[persistence] Dead-lettered {doc.doc_id} ({reason}) -> {base}.json")
+
+    def _clear_dead_letters(self, docs):
+        for doc in docs:
+            if doc.from_dead_letter:
+                base = self.deadletter_dir / doc.doc_id
+                try:
+                    base.with_suffix(".json").unlink(missing_ok=True)
+                    base.with_suffix(".pdf").unlink(missing_ok=True)
+                except OSError as e:
+                    # Written already; a later replay just rewrites the same row.
+                    print(f"[persistence] Could not remove dead letter {base}: {e}")
+
+    def replay_dead_letters(self) -> int:
+        """
+        Re-queue every dead-lettered document; returns how many were found.
+        The files stay on disk until their document is written, so a crash
+        mid-replay loses nothing; a failure rewrites them.
+        """
+        count = 0
+        for path in sorted(self.deadletter_dir.glob("*.json")):
+            record = json.loads(path.read_text())
+            doc = PendingDocument(**record["document"], from_dead_letter=True)
+            self._accept(doc)
+            if record.get("storage_uploaded"):
+                self._rows.put(doc)
+            else:
+                doc.pdf_bytes = path.with_suffix(".pdf").read_bytes()
+                self._acquire_bytes(len(doc.pdf_bytes))
+                self._uploads.submit(self._upload, doc)
+            count += 1
+        return count
+
+
+@lru_cache(maxsize=1)
+def get_persistence() -> Persistence:
+    """Process-wide persistence layer, configured from the environment.
+
+    Created on first use rather than at import so that, under a preforking
+    server, each worker starts its own threads after the fork. On exit it
+    drains for PRISM_SHUTDOWN_DRAIN_S seconds (default 20), which must stay
+    below the server's graceful shutdown timeout (see gunicorn.conf.py).
+    """
+    persistence = Persistence(
+        upload_workers=int(os.getenv("PRISM_UPLOAD_WORKERS", "4")),
+        max_inflight_bytes=int(os.getenv("PRISM_UPLOAD_MAX_INFLIGHT_MB", "64")) << 20,
+        batch_size=int(os.getenv("PRISM_WRITE_BATCH_SIZE", "100")),
+        linger=float(os.getenv("PRISM_WRITE_LINGER_MS", "200")) / 1000,
+        deadletter_dir=os.getenv("PRISM_DEADLETTER_DIR", "deadletter"),
+    )
+    drain = float(os.getenv("PRISM_SHUTDOWN_DRAIN_S", "20"))
+    atexit.register(persistence.close, drain)
+    return persistence
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PRISM persistence maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("replay", help="retry dead-lettered documents")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        persistence = get_persistence()
+        count = persistence.replay_dead_letters()
+        persistence.flush()
+        remaining = len(list(persistence.deadletter_dir.glob("*.json")))
+        print(f"Replayed {count} documents; {remaining} still dead-lettered")
+
+
+if __name__ == "__main__":
+    main()
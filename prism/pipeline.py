@@ -2,36 +2,54 @@
 from __future__ import annotations
 from pathlib import Path
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 
 from .pdf_utils import pdf_to_text
 from .stats import run_statcheck_single, grim_passes
 from .extract import find_mean_n_pairs
 
 
-def run_checks(pdf_path: str | Path) -> Dict[str, Any]:
+ProgressCallback = Callable[[str, Any], None]
+
+
+def run_checks(
+    pdf_path: str | Path, progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
     """
     Master Phase 1 routine.
     1. Extract text
     2. Run statcheck (p‑value consistency)
     3. For rows with a mean & N, run GRIM
     4. Return dict -> JSON‑serialisable
+
+    If given, ``progress(event, payload)`` is called as each stage finishes:
+      "text"       -> number of characters extracted
+      "stat_tests" -> the statcheck DataFrame
+      "grim_check" -> one GRIM result dict, as soon as it is computed
+    It runs on the caller's thread, so callers on an event loop must hand the
+    event over themselves (see app.py).
     """
+    report = progress or (lambda event, payload: None)
+
     text = pdf_to_text(pdf_path)
+    report("text", len(text))
+
     df = run_statcheck_single(pdf_path)
+    report("stat_tests", df)
+
     mean_hits = find_mean_n_pairs(text)
 
     grim_results = []  # Initialize outside the loop
     for hit in mean_hits:
         grim_ok = grim_passes(hit["mean"], hit["n"])
-        grim_results.append(
-            {
-                "sentence": hit["sentence"],
-                "mean": hit["mean"],
-                "n": hit["n"],
-                "grim_ok": grim_ok,
-            }
-        )
+        grim_result = {
+            "sentence": hit["sentence"],
+            "mean": hit["mean"],
+            "n": hit["n"],
+            "grim_ok": grim_ok,
+        }
+        grim_results.append(grim_result)
+        report("grim_check", grim_result)
     return {
         "stat_tests": df,
         "grim_checks": grim_results,
@@ -1,8 +1,12 @@
 # prism/stats.py  –– pure‑Python now
-from typing import List, Dict, Any
-import pandas as pd
-from grim import mean_tester
-from statcheck.checkdir import checkPDFdir  # core helper
+from __future__ import annotations
+from typing import List, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# grim and statcheck (which pull in pandas/scipy) are imported on first use so
+# that importing prism.pipeline stays cheap for the web entry points.
 
 
 def run_statcheck_single(pdf_path: str) -> pd.DataFrame:
@@ -10,6 +14,8 @@ def run_statcheck_single(pdf_path: str) -> pd.DataFrame:
     Thin wrapper around statcheck's checkPDFdir().
     Returns the same DataFrame format the R version produced.
     """
+    from statcheck.checkdir import checkPDFdir  # core helper
+
     # checkPDFdir expects a directory; give it a tmp dir with one file
     df_results, df_pvals = checkPDFdir(
         dir="pdfs",
@@ -20,6 +26,8 @@ def run_statcheck_single(pdf_path: str) -> pd.DataFrame:
 
 
 def grim_passes(mean, n):
+    from grim import mean_tester
+
     try:
         return mean_tester.consistency_check(str(mean), str(n))
     except Exception as e:
@@ -1,6 +1,11 @@
+from __future__ import annotations
+
 import os
 from functools import lru_cache
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 @lru_cache(maxsize=1)
@@ -21,4 +26,6 @@ def get_supabase_client() -> Client:
             "SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables must be set to connect to Supabase."
         )
 
+    from supabase import create_client  # deferred: the client stack is slow to import
+
     return create_client(supabase_url, supabase_key)
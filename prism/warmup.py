@@ -0,0 +1,42 @@
+# prism/warmup.py
+"""Optional eager loading of the heavy dependencies the entry points defer.
+
+api.py and the analysis pipeline import pandas, openai, pdfplumber, etc. on
+first use. Under a preforking server (see gunicorn.conf.py) it is cheaper to
+pay that cost once in the master and let every forked worker inherit the
+already-imported modules.
+"""
+from __future__ import annotations
+
+import importlib
+import time
+from typing import Dict, Iterable
+
+HEAVY_MODULES = (
+    "pandas",
+    "openai",
+    "arxiv",
+    "requests",
+    "supabase",
+    "pdfplumber",
+    "grim.mean_tester",
+    "statcheck.checkdir",
+)
+
+
+def preload_heavy_modules(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """
+    Import each module and return {module: seconds spent}.
+    Missing optional packages are reported and skipped rather than raised,
+    so a partial install still boots.
+    """
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"[warmup] Skipping {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
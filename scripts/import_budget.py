@@ -0,0 +1,95 @@
+"""Measure cold import time of each entry point against a budget.
+
+Each module is imported in a fresh interpreter so nothing is cached between
+runs. Exits non-zero if any entry point is over budget, printing the slowest
+imports (from ``python -X importtime``) to show what to defer.
+
+    python scripts/import_budget.py
+    python scripts/import_budget.py --repeat 5 api
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budgets in milliseconds. app.py has to import chainlit itself, so it gets
+# more headroom; everything else should stay well clear of the heavy stack.
+BUDGETS_MS = {
+    "api": 400,
+    "app": 2500,
+    "prism.pipeline": 50,
+}
+
+_TIMER = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def measure(module, repeat=3):
+    """Return the best-of-``repeat`` cold import time of ``module`` in ms."""
+    env = dict(os.environ, PRISM_PRELOAD="0")
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(module=module)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        ms = float(out.stdout.strip().splitlines()[-1])
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def slowest_imports(module, top=10):
+    """Return the ``top`` slowest cumulative imports as (ms, name) pairs."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    over = False
+    for module in args.modules:
+        budget = BUDGETS_MS.get(module)
+        try:
+            ms = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<16} FAILED TO IMPORT\n{e.stderr}")
+            over = True
+            continue
+
+        status = "ok" if budget is None or ms <= budget else "OVER"
+        print(f"{module:<16} {ms:8.1f} ms  (budget {budget} ms)  {status}")
+        if status == "OVER":
+            over = True
+            for cum_ms, name in slowest_imports(module):
+                print(f"    {cum_ms:8.1f} ms  {name}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+-- Cross-paper findings index: one row per statcheck test or GRIM check,
+-- flattened from documents.results so corpus queries hit typed, indexed
+-- columns instead of re-parsing every JSON blob. Maintained by
+-- prism/findings.py on each upload; backfill with `python -m prism.findings`.
+
+create table if not exists public.findings (
+    document_id     uuid        not null references public.documents (id) on delete cascade,
+    kind            text        not null check (kind in ('stat_test', 'grim')),
+    ordinal         integer     not null,  -- position within the document's results
+    uploaded_at     timestamptz,
+
+    -- stat_test rows
+    test_type       text,                  -- statcheck statistic, lower-cased: t, f, r, chi2, z, q
+    test_statistic  double precision,
+    df1             double precision,
+    df2             double precision,
+    reported_p      double precision,
+    computed_p      double precision,
+    error           boolean,               -- reported p inconsistent with the test statistic
+    decision_error  boolean,               -- ... and the inconsistency flips significance
+    source          text,
+
+    -- grim rows
+    mean            double precision,
+    n               integer,
+    grim_passed     boolean,
+    sentence        text,
+
+    primary key (document_id, kind, ordinal)
+);
+
+create index if not exists findings_test_type_idx on public.findings (test_type);
+create index if not exists findings_n_idx on public.findings (n);
+create index if not exists findings_error_idx on public.findings (test_type) where error;
+create index if not exists findings_decision_error_idx
+    on public.findings (test_type) where decision_error;
+create index if not exists findings_grim_failed_idx
+    on public.findings (n) where grim_passed = false;
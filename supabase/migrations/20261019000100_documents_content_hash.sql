@@ -0,0 +1,9 @@
+-- Key documents by the SHA-256 of the PDF so prism/persistence.py can write
+-- them in multi-row upserts and a re-uploaded paper updates its existing row.
+alter table public.documents add column if not exists content_hash text;
+create unique index if not exists documents_content_hash_key
+    on public.documents (content_hash);
+
+-- Upserts omit uploaded_at: new rows take the default, and re-uploads keep
+-- their original time (and position in the export's uploaded_at order).
+alter table public.documents alter column uploaded_at set default now();
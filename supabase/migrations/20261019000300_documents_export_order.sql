@@ -0,0 +1,4 @@
+-- prism/export.py pages documents by keyset on (uploaded_at, id); this index
+-- lets each page start where the previous one ended instead of re-sorting.
+create index if not exists documents_uploaded_at_id_idx
+    on public.documents (uploaded_at, id);
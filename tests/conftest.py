@@ -0,0 +1,22 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loadtest.fakes import FakeSupabase
+
+
+@pytest.fixture
+def db():
+    return FakeSupabase()
+
+
+@pytest.fixture
+def table_calls(db):
+    """Names of the tables queried through ``db`` from here on, in order."""
+    calls = []
+    table = db.table
+    db.table = lambda name: calls.append(name) or table(name)
+    return calls
@@ -0,0 +1,98 @@
+import sys
+import os
+import io
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from prism.export import export, iter_documents
+
+
+def add_document(db, doc_id, uploaded_at, grim_passed=(True,)):
+    results = {
+        "stat_tests": [{"test": "t test", "significant": True}],
+        "grim_checks": [{"mean": 3.5, "n": 20, "passed": p} for p in grim_passed],
+    }
+    db.table("documents").insert(
+        {
+            "id": doc_id,
+            "filename": f"{doc_id}.pdf",
+            "uploaded_at": uploaded_at,
+            "results": json.dumps(results),
+            "review": "ok",
+        }
+    ).execute()
+
+
+@pytest.fixture
+def db(db):
+    for day in range(1, 8):
+        add_document(db, f"doc{day}", f"2025-01-0{day}T12:00:00+00:00", (day % 3 != 0,))
+    return db
+
+
+def test_pages_through_every_document_in_order(db, table_calls):
+    ids = [row["id"] for row in iter_documents(db, page_size=3)]
+
+    assert ids == [f"doc{day}" for day in range(1, 8)]
+    assert len(table_calls) == 3  # 3 + 3 + 1 rows
+
+
+def test_keyset_paging_handles_ties_and_deletes(db):
+    for doc_id in ("tie-b", "tie-a", "tie-c"):
+        add_document(db, doc_id, "2025-01-03T12:00:00+00:00")
+    seen = []
+
+    for row in iter_documents(db, page_size=2):
+        seen.append(row["id"])
+        if row["id"] == "doc2":  # an offset cursor would now skip doc3
+            db.table("documents").delete().eq("id", "doc1").execute()
+
+    assert seen == ["doc1", "doc2", "doc3", "tie-a", "tie-b", "tie-c"] + [
+        f"doc{day}" for day in range(4, 8)
+    ]
+
+
+def test_ndjson_parses_results_and_filters_grim_failures(db):
+    lines = list(export(db, "ndjson", grim_failures_only=True, page_size=2))
+
+    records = [json.loads(line) for line in lines]
+    assert [r["id"] for r in records] == ["doc3", "doc6"]
+    assert records[0]["results"]["grim_checks"][0]["passed"] is False
+
+
+def test_date_range_treats_date_only_until_as_whole_day(db):
+    lines = export(db, "ndjson", since="2025-01-02", until="2025-01-04")
+
+    assert [json.loads(line)["id"] for line in lines] == ["doc2", "doc3", "doc4"]
+
+
+def test_datetime_until_is_exact(db):
+    lines = export(db, "ndjson", until="2025-01-02T11:00:00+00:00")
+
+    assert [json.loads(line)["id"] for line in lines] == ["doc1"]
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"fmt": "csv"}, {"since": "last tuesday"}, {"until": "2025-13-01"}]
+)
+def test_bad_arguments_are_rejected_before_streaming(db, table_calls, kwargs):
+    with pytest.raises(ValueError):
+        export(db, **kwargs)
+    assert table_calls == []
+
+
+def test_parquet_round_trip(db):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    chunks = list(export(db, "parquet", page_size=3))
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+
+    assert len(chunks) > 2  # streamed in row groups, not built in one piece
+    assert table.num_rows == 7
+    rows = table.to_pylist()
+    assert [r["id"] for r in rows] == [f"doc{day}" for day in range(1, 8)]
+    assert [r["n_grim_failures"] for r in rows] == [0, 0, 1, 0, 0, 1, 0]
+    assert json.loads(rows[0]["results"])["stat_tests"][0]["test"] == "t test"
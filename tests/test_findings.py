@@ -0,0 +1,99 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from prism.findings import FINDINGS_COLUMNS, flatten_findings, index_document, query_findings
+
+RESULTS = {
+    "stat_tests": [
+        {
+            "test": "F test",
+            "p_value": 0.028,
+            "reported_p": 0.01,
+            "significant": False,
+            "error": True,
+            "decision_error": False,
+            "df1": 2.0,
+            "df2": 27.0,
+            "test_statistic": 4.1,
+            "source": "paper",
+        },
+        {
+            "test": "Chi2 test",
+            "p_value": float("nan"),
+            "significant": False,
+            # Stored before decision_error/error existed: only the note has it.
+            "note": "Decision Error: True",
+        },
+    ],
+    "grim_checks": [
+        {"sentence": "M = 3.47, N = 21.", "mean": 3.47, "n": 21, "passed": False},
+        {"sentence": "M = 5.20, N = 25.", "mean": 5.2, "n": 25, "passed": True},
+        {"sentence": "M = 2.11, N = 45.", "mean": 2.11, "n": 45, "passed": False},
+    ],
+}
+
+
+def test_flatten_findings_types_and_pads_rows():
+    rows = flatten_findings("doc1", RESULTS, "2025-01-01T00:00:00+00:00")
+
+    assert [(r["kind"], r["ordinal"]) for r in rows] == [
+        ("stat_test", 0), ("stat_test", 1), ("grim", 0), ("grim", 1), ("grim", 2),
+    ]
+    assert all(tuple(r) == FINDINGS_COLUMNS for r in rows)
+    f_test, chi2 = rows[0], rows[1]
+    assert f_test["test_type"] == "f"
+    assert (f_test["error"], f_test["decision_error"]) == (True, False)
+    assert (f_test["computed_p"], f_test["reported_p"]) == (0.028, 0.01)
+    assert chi2["test_type"] == "chi2"
+    assert chi2["computed_p"] is None  # NaN is not valid PostgREST input
+    assert (chi2["error"], chi2["decision_error"]) == (True, True)
+    assert rows[2]["n"] == 21 and rows[2]["grim_passed"] is False
+    assert rows[2]["mean"] is not None and rows[0]["mean"] is None
+
+
+@pytest.fixture
+def db(db):
+    index_document(db, "doc1", RESULTS)
+    index_document(db, "doc2", {"stat_tests": [], "grim_checks": RESULTS["grim_checks"][:1]})
+    return db
+
+
+def test_query_filters(db):
+    decision_errors = query_findings(db, test_type="CHI2", decision_error=True)
+    assert [(r["document_id"], r["ordinal"]) for r in decision_errors] == [("doc1", 1)]
+
+    assert [r["test_type"] for r in query_findings(db, test_type="F", error=True)] == ["f"]
+
+    small_failures = query_findings(db, grim_passed=False, max_n=29)
+    assert sorted(r["document_id"] for r in small_failures) == ["doc1", "doc2"]
+
+    assert len(query_findings(db, kind="grim", min_n=25)) == 2
+    assert len(query_findings(db, document_id="doc2")) == 1
+
+
+def test_query_paging(db):
+    first = query_findings(db, document_id="doc1", limit=3)
+    rest = query_findings(db, document_id="doc1", limit=3, offset=3)
+
+    assert len(first) == 3 and len(rest) == 2
+    assert not {(r["kind"], r["ordinal"]) for r in first} & {
+        (r["kind"], r["ordinal"]) for r in rest
+    }
+
+
+def test_reindex_is_idempotent_and_drops_stale_rows(db):
+    assert index_document(db, "doc1", RESULTS) == 5
+    assert len(query_findings(db, document_id="doc1")) == 5
+
+    smaller = {"stat_tests": [], "grim_checks": [RESULTS["grim_checks"][1]]}
+    assert index_document(db, "doc1", smaller) == 1
+
+    rows = query_findings(db, document_id="doc1")
+    assert [(r["kind"], r["ordinal"], r["grim_passed"]) for r in rows] == [
+        ("grim", 0, True)
+    ]
+    assert len(query_findings(db, document_id="doc2")) == 1  # untouched
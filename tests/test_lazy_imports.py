@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY = ("pandas", "statcheck", "pdfplumber", "openai", "supabase")
+
+_CHECK = (
+    "import sys; import {module}; "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def loaded_heavy_modules(module):
+    """Import ``module`` in a fresh interpreter; return the heavy deps it pulled in."""
+    env = dict(os.environ, PRISM_PRELOAD="0")
+    out = subprocess.run(
+        [sys.executable, "-c", _CHECK.format(module=module, heavy=HEAVY)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["prism.pipeline", "prism.persistence", "prism.export", "prism.findings"],
+)
+def test_prism_modules_import_lazily(module):
+    assert loaded_heavy_modules(module) == []
+
+
+def test_api_imports_lazily():
+    if not all(importlib.util.find_spec(m) for m in ("flask", "flask_cors")):
+        pytest.skip("Flask not installed")
+    assert loaded_heavy_modules("api") == []
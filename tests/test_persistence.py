@@ -0,0 +1,156 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loadtest.fakes import FaultProfile
+from prism.persistence import Persistence, document_id_for, content_hash
+
+RESULTS = {
+    "stat_tests": [{"test": "F test", "significant": False, "error": True}],
+    "grim_checks": [{"mean": 3.47, "n": 21, "passed": False}],
+}
+
+
+@pytest.fixture
+def make(db, tmp_path):
+    created = []
+
+    def make(**kwargs):
+        kwargs.setdefault("linger", 0.05)
+        kwargs.setdefault("attempts", 1)
+        kwargs.setdefault("deadletter_dir", tmp_path)
+        p = Persistence(client_factory=lambda: db, **kwargs)
+        created.append(p)
+        return p
+
+    yield make
+    for p in created:
+        p.close(timeout=5)
+
+
+def deadletters(path):
+    return sorted(f.name for f in path.iterdir())
+
+
+def test_batches_rows_into_few_round_trips(db, make, table_calls):
+    p = make(linger=0.2)
+
+    docs = [p.save_document(f"pdf {i}".encode(), f"{i}.pdf", RESULTS, "r") for i in range(20)]
+
+    assert p.flush(5)
+    assert len(db.objects["documents"]) == 20
+    assert len(db.tables["documents"]) == 20
+    assert len(db.tables["findings"]) == 40
+    # One documents upsert plus one findings delete + upsert per batch.
+    assert len(table_calls) <= 6
+    row = db.table("documents").select("*").eq("id", docs[0].doc_id).single().execute()
+    assert row.data["public_url"] == docs[0].public_url
+
+
+def test_same_content_is_one_document(db, make):
+    p = make()
+
+    a = p.save_document(b"same pdf", "a.pdf", RESULTS, "r")
+    b = p.save_document(b"same pdf", "b.pdf", RESULTS, "r")
+
+    assert p.flush(5)
+    assert a.doc_id == b.doc_id == document_id_for(content_hash(b"same pdf"))
+    assert len(db.tables["documents"]) == 1
+    assert len(db.tables["findings"]) == 2
+
+
+def test_reupload_overwrites_object_and_keeps_upload_time(db, make, tmp_path):
+    p = make()
+    doc = p.save_document(b"paper", "a.pdf", RESULTS, "first")
+    p.flush(5)
+    (first,) = db.tables["documents"].values()
+    uploaded_at = first["uploaded_at"]
+
+    # Same bytes and filename: the same storage path, so this needs x-upsert.
+    p.save_document(b"paper", "a.pdf", RESULTS, "second")
+    p.flush(5)
+
+    assert deadletters(tmp_path) == []
+    assert list(db.objects["documents"]) == [doc.storage_path]
+    (row,) = db.tables["documents"].values()
+    assert row["review"] == "second"
+    assert row["uploaded_at"] == uploaded_at
+
+
+def test_failed_storage_upload_is_dead_lettered_and_replayed(db, make, tmp_path):
+    db.storage_profile = FaultProfile(error_rate=1)
+    p = make()
+    doc = p.save_document(b"paper", "a.pdf", RESULTS, "r")
+    assert p.flush(5)
+    assert deadletters(tmp_path) == [f"{doc.doc_id}.json", f"{doc.doc_id}.pdf"]
+    assert "documents" not in db.tables
+
+    # Still failing: the files are kept (rewritten), never dropped.
+    assert p.replay_dead_letters() == 1
+    assert p.flush(5)
+    assert deadletters(tmp_path) == [f"{doc.doc_id}.json", f"{doc.doc_id}.pdf"]
+
+    db.storage_profile = FaultProfile()
+    assert p.replay_dead_letters() == 1
+    assert p.flush(5)
+    assert deadletters(tmp_path) == []
+    assert len(db.tables["documents"]) == 1
+    assert db.objects["documents"][doc.storage_path] == b"paper"
+
+
+def test_failed_row_write_is_dead_lettered_without_pdf(db, make, tmp_path):
+    db.profile = FaultProfile(error_rate=1)
+    p = make()
+    doc = p.save_document(b"paper", "a.pdf", RESULTS, "r")
+    assert p.flush(5)
+    assert deadletters(tmp_path) == [f"{doc.doc_id}.json"]  # PDF already stored
+
+    db.profile = FaultProfile()
+    p.replay_dead_letters()
+    assert p.flush(5)
+    assert deadletters(tmp_path) == []
+    assert len(db.tables["findings"]) == 2
+
+
+def test_replay_keeps_files_until_written(db, make, tmp_path):
+    db.profile = FaultProfile(error_rate=1)
+    p = make()
+    doc = p.save_document(b"paper", "a.pdf", RESULTS, "r")
+    p.flush(5)
+
+    db.profile = FaultProfile(latency_ms=300)
+    p.replay_dead_letters()
+    assert deadletters(tmp_path) == [f"{doc.doc_id}.json"]  # still in flight
+    assert p.flush(5)
+    assert deadletters(tmp_path) == []
+
+
+def test_close_dead_letters_documents_it_could_not_finish(db, make, tmp_path):
+    db.storage_profile = FaultProfile(latency_ms=1000)
+    p = make(upload_workers=1)
+    docs = [p.save_document(f"pdf {i}".encode(), f"{i}.pdf", RESULTS, "r") for i in range(3)]
+
+    p.close(timeout=0.1)
+
+    files = deadletters(tmp_path)
+    for doc in docs:
+        assert f"{doc.doc_id}.json" in files
+        assert f"{doc.doc_id}.pdf" in files
+
+
+def test_unwritable_dead_letter_dir_does_not_stall_the_writer(db, make, tmp_path):
+    blocked = tmp_path / "blocked"
+    blocked.write_text("a file, so the directory cannot be created")
+    db.profile = FaultProfile(error_rate=1)
+    p = make(deadletter_dir=blocked)
+
+    p.save_document(b"paper", "a.pdf", RESULTS, "r")
+    assert p.flush(5)  # logged as lost rather than left pending
+
+    db.profile = FaultProfile()
+    p.save_document(b"another", "b.pdf", RESULTS, "r")
+    assert p.flush(5)
+    assert len(db.tables["documents"]) == 1
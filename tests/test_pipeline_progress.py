@@ -0,0 +1,38 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from prism import pipeline
+
+
+def fake_stages(monkeypatch):
+    text = "Group A scored M = 3.47 (N = 21). Group B scored M = 5.20, N = 25."
+    monkeypatch.setattr(pipeline, "pdf_to_text", lambda path: text)
+    monkeypatch.setattr(pipeline, "run_statcheck_single", lambda path: "stat-df")
+    monkeypatch.setattr(pipeline, "grim_passes", lambda mean, n: mean != 3.47)
+    return text
+
+
+def test_progress_events_in_stage_order(monkeypatch):
+    text = fake_stages(monkeypatch)
+    events = []
+
+    results = pipeline.run_checks("paper.pdf", lambda e, p: events.append((e, p)))
+
+    assert [e for e, _ in events] == ["text", "stat_tests", "grim_check", "grim_check"]
+    assert events[0][1] == len(text)
+    assert events[1][1] == "stat-df"
+    # Each GRIM result is reported as soon as it is computed, and is the same
+    # dict that ends up in the returned results.
+    assert [p for e, p in events[2:]] == results["grim_checks"]
+    assert [p["grim_ok"] for _, p in events[2:]] == [False, True]
+
+
+def test_progress_is_optional(monkeypatch):
+    fake_stages(monkeypatch)
+
+    results = pipeline.run_checks("paper.pdf")
+
+    assert results["stat_tests"] == "stat-df"
+    assert len(results["grim_checks"]) == 2